@@ -7,19 +7,49 @@ except ImportError:
 
 import os
 from dotenv import load_dotenv
+import atexit
 import json
 import sqlite3
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
 import random
+from generation_cache import GenerationCache
 
 load_dotenv()
 
+@lru_cache(maxsize=1024)
+def build_prompt(theme: str, theme_description: str = "") -> str:
+    """Build the generation prompt for a theme (cached, themes repeat a lot)"""
+    return f"""
+            Generate a creative and engaging "Would You Rather" question for the theme: {theme}
+            Theme description: {theme_description}
+            
+            Rules:
+            1. Create two compelling options that are roughly equally appealing/difficult to choose
+            2. Make sure both options relate to the theme
+            3. Keep each option concise but descriptive (max 100 characters each)
+            4. Make it thought-provoking and fun
+            5. Avoid overly dark or inappropriate content
+            
+            Respond with ONLY a JSON object in this exact format:
+            {{
+                "option_a": "Your first option here",
+                "option_b": "Your second option here"
+            }}
+            """
+
 class AIQuestionGenerator:
     def __init__(self):
         if OPENAI_AVAILABLE:
             self.client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
         else:
             self.client = None
+        
+        # Previously generated questions per theme, reused before calling the API again
+        self.cache = GenerationCache(os.getenv('GENERATION_CACHE_PATH', 'generation_cache.json'))
+        self.cache.load()
+        atexit.register(self.cache.save)
+        self.upstream_calls = 0
             
         # Fallback questions for different themes
         self.fallback_questions = {
@@ -65,39 +95,38 @@ class AIQuestionGenerator:
             ]
         }
         
-    def generate_question(self, theme: str, theme_description: str = "") -> Optional[Dict[str, str]]:
+    def generate_question(self, theme: str, theme_description: str = "", theme_id: Optional[int] = None) -> Optional[Dict[str, str]]:
         """Generate a new 'Would You Rather' question for the given theme"""
         
+        # Reuse a cached question this theme hasn't stored yet
+        if theme_id is not None:
+            used = self._used_questions(theme_id, self.cache.candidates(theme, theme_description))
+            cached = self.cache.get_unused(theme, theme_description, used)
+            if cached:
+                return cached
+        
         # Try AI generation first if available
-        if OPENAI_AVAILABLE and self.client and os.getenv('OPENAI_API_KEY'):
+        if self.ai_enabled():
             try:
-                return self._generate_ai_question(theme, theme_description)
+                ai_question = self._generate_ai_question(theme, theme_description)
+                if ai_question:
+                    self.cache.add(theme, theme_description, ai_question)
+                    return ai_question
             except Exception as e:
                 print(f"AI generation failed: {e}, falling back to predefined questions")
         
         # Fallback to predefined questions
         return self._generate_fallback_question(theme)
     
+    def ai_enabled(self) -> bool:
+        """Whether questions come from OpenAI rather than the predefined fallback lists"""
+        return bool(OPENAI_AVAILABLE and self.client and os.getenv('OPENAI_API_KEY'))
+    
     def _generate_ai_question(self, theme: str, theme_description: str = "") -> Optional[Dict[str, str]]:
         """Generate question using OpenAI API"""
         try:
-            prompt = f"""
-            Generate a creative and engaging "Would You Rather" question for the theme: {theme}
-            Theme description: {theme_description}
-            
-            Rules:
-            1. Create two compelling options that are roughly equally appealing/difficult to choose
-            2. Make sure both options relate to the theme
-            3. Keep each option concise but descriptive (max 100 characters each)
-            4. Make it thought-provoking and fun
-            5. Avoid overly dark or inappropriate content
-            
-            Respond with ONLY a JSON object in this exact format:
-            {{
-                "option_a": "Your first option here",
-                "option_b": "Your second option here"
-            }}
-            """
+            prompt = build_prompt(theme, theme_description)
+            self.upstream_calls += 1
             
             response = self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
@@ -122,6 +151,30 @@ class AIQuestionGenerator:
             print(f"Error generating AI question: {e}")
             return None
     
+    def _used_questions(self, theme_id: int, candidates: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """Which of the candidate questions are already stored for a theme"""
+        if not candidates:
+            return set()
+        try:
+            conn = sqlite3.connect('game.db')
+            placeholders = ','.join('?' * len(candidates))
+            rows = conn.execute(f'''
+                SELECT option_a, option_b FROM questions
+                WHERE theme_id = ? AND option_a IN ({placeholders})
+            ''', [theme_id] + [option_a for option_a, _ in candidates]).fetchall()
+            conn.close()
+            return set(rows)
+        except Exception as e:
+            print(f"Error checking cached questions: {e}")
+            # Treat every candidate as used rather than risk serving a duplicate
+            return set(candidates)
+    
+    def cache_stats(self) -> Dict:
+        """Generation cache hit rate and upstream call counts"""
+        stats = self.cache.stats()
+        stats['upstream_calls'] = self.upstream_calls
+        return stats
+    
     def _generate_fallback_question(self, theme: str) -> Optional[Dict[str, str]]:
         """Generate question from predefined list"""
         if theme in self.fallback_questions:
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, redirect
 from flask_cors import CORS
 import sqlite3
 import uuid
@@ -8,22 +8,74 @@ import secrets
 from datetime import datetime, timedelta
 from ai_generator import AIQuestionGenerator
 from database import init_db, create_user, get_user_by_username, get_user_by_email, create_user_session, get_user_by_session, delete_user_session
+from live_tallies import TallyBroker
+from migrate_db import migrate_database
+from maintenance import create_scheduler
+from question_cache import SerializedQuestionCache
+from question_corpus import QuestionCorpus
+from question_index import QuestionIndex, UsageCounter
+from response_store import ResponseStore
+from sql_profiler import init_sql_profiling, profiling_mode
+from rate_limiter import LoadShedder, create_rate_limiter, client_ip, rate_limit_exceeded, init_load_shedding, skip_latency_sample
+from functools import wraps
+import atexit
 import os
 
 app = Flask(__name__)
 CORS(app)
 
-# Initialize database on startup
+# Bring an existing database up to the current schema, then initialize it
+migrate_database()
 init_db()
 
 # Initialize AI generator
 ai_generator = AIQuestionGenerator()
 
+# Compact in-memory copy of all questions, and the freshness-weighted
+# sampling index built over it
+question_corpus = QuestionCorpus()
+question_index = QuestionIndex(question_corpus)
+question_index.rebuild()
+question_usage = UsageCounter()
+atexit.register(question_usage.flush)
+
+# Serialized question bodies for GET /api/question/<id>
+question_cache = SerializedQuestionCache(int(os.getenv('QUESTION_CACHE_SIZE', '10000')))
+
+# Initialize rate limiting and load shedding
+rate_limiter = create_rate_limiter()
+load_shedder = LoadShedder(
+    max_in_flight=int(os.getenv('MAX_IN_FLIGHT_REQUESTS', '64')),
+    max_latency_ms=float(os.getenv('MAX_REQUEST_LATENCY_MS', '2000'))
+)
+# Endpoints that wait on OpenAI or hold a stream open are slow by design, so
+# they are kept out of the latency average that decides when to shed
+init_load_shedding(app, load_shedder, exempt_endpoints={'generate_new_question', 'stream_question_stats'})
+
+# Optional per-request SQL profiling (SQL_PROFILE=1, or SQL_PROFILE=strict to fail over-budget requests)
+sql_profiler_stats = None
+if profiling_mode():
+    sql_profiler_stats = init_sql_profiling(app, strict=profiling_mode() == 'strict')
+
 def get_db_connection():
     conn = sqlite3.connect('game.db')
     conn.row_factory = sqlite3.Row
     return conn
 
+# Votes are stored in monthly partition files with per-question tallies in game.db
+response_store = ResponseStore(base_dir=os.getenv('RESPONSES_DIR', 'responses'))
+response_store.ensure_tallies()
+
+# Live vote tallies pushed over server-sent events
+tally_broker = TallyBroker(response_store.get_tallies, max_subscribers=int(os.getenv('MAX_STATS_SUBSCRIBERS', '1000')))
+STATS_STREAM_INTERVAL = float(os.getenv('STATS_STREAM_INTERVAL', '1.0'))
+
+# Background maintenance and warm-up jobs
+scheduler = create_scheduler(ai_generator, question_index, question_usage, response_store)
+SCHEDULER_ENABLED = os.getenv('ENABLE_SCHEDULER', '1') == '1'
+if SCHEDULER_ENABLED:
+    scheduler.start()
+
 def hash_password(password):
     """Hash a password using SHA-256"""
     return hashlib.sha256(password.encode()).hexdigest()
@@ -41,6 +93,26 @@ def get_current_user(request):
     token = auth_header.split(' ')[1]
     return get_user_by_session(token)
 
+def check_rate_limit(endpoint):
+    """Return a 429 response if the caller is over its limit for this endpoint"""
+    user = get_current_user(request)
+    allowed, retry_after = rate_limiter.check(endpoint, client_ip(), user['id'] if user else None)
+    if not allowed:
+        return rate_limit_exceeded(retry_after)
+    return None
+
+def rate_limited(endpoint):
+    """Decorator applying the rate limits configured for an endpoint"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            limited = check_rate_limit(endpoint)
+            if limited:
+                return limited
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
 @app.route('/api/themes', methods=['GET'])
 def get_themes():
     """Get all available themes (system + user's custom themes)"""
@@ -119,38 +191,92 @@ def create_theme():
         'is_public': is_public
     })
 
+def question_reference(question_id):
+    """Point the client at the cacheable question URL instead of sending the question body"""
+    url = f"/api/question/{question_id}"
+    if request.args.get('redirect'):
+        response = redirect(url, code=302)
+    else:
+        response = jsonify({'id': question_id, 'url': url})
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def serve_question(question_id):
+    """Count a serve of a sampled question and return a reference to it"""
+    if question_id is None:
+        return None
+    
+    # Usage counts are buffered and written in batches by the scheduler,
+    # or from here every so often when it isn't running
+    question_usage.record(question_id)
+    question_index.record_use(question_id)
+    if not SCHEDULER_ENABLED:
+        question_usage.flush_if_due()
+    return question_reference(question_id)
+
+@app.route('/api/question/<int:question_id>', methods=['GET'])
+def get_question_by_id(question_id):
+    """Get a single question; question content never changes so it is cached for good"""
+    entry = question_cache.get(question_id)
+    if entry is None:
+        record = question_corpus.get(question_id)
+        if record:
+            question = record.to_dict()
+        else:
+            # Not in this worker's corpus yet (e.g. created by another worker)
+            conn = get_db_connection()
+            row = conn.execute('''
+                SELECT q.id, q.theme_id, q.option_a, q.option_b, q.ai_generated, q.created_at,
+                       t.name as theme_name, t.description as theme_description
+                FROM questions q 
+                JOIN themes t ON q.theme_id = t.id 
+                WHERE q.id = ?
+            ''', (question_id,)).fetchone()
+            conn.close()
+            
+            if not row:
+                return jsonify({'error': 'Question not found'}), 404
+            question = dict(row)
+        
+        entry = question_cache.put(question_id, question)
+    
+    body, etag = entry
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response.make_conditional(request)
+
 @app.route('/api/questions/<int:theme_id>', methods=['GET'])
 def get_question(theme_id):
     """Get a random question for a specific theme, generate new one if needed"""
-    conn = get_db_connection()
-    
-    # First, try to get an existing question
-    questions = conn.execute('''
-        SELECT q.*, t.name as theme_name, t.description as theme_description
-        FROM questions q 
-        JOIN themes t ON q.theme_id = t.id 
-        WHERE q.theme_id = ? 
-        ORDER BY RANDOM() 
-        LIMIT 1
-    ''', (theme_id,)).fetchall()
-    
-    if questions:
-        question = dict(questions[0])
-        # Update usage count
-        conn.execute('UPDATE questions SET times_used = times_used + 1 WHERE id = ?', (question['id'],))
-        conn.commit()
-        conn.close()
-        return jsonify(question)
+    # First, try to get an existing question, favouring fresh and rarely served ones
+    reference = serve_question(question_index.sample(theme_id))
+    if reference:
+        return reference
+    
+    # Another worker, the bulk importer or the pre-generate job may have
+    # stored questions since this worker's index was last rebuilt
+    if question_index.load_from_db('q.theme_id = ?', (theme_id,)):
+        reference = serve_question(question_index.sample(theme_id))
+        if reference:
+            return reference
     
     # If no questions exist, get theme info for AI generation
+    conn = get_db_connection()
     theme = conn.execute('SELECT * FROM themes WHERE id = ?', (theme_id,)).fetchone()
     conn.close()
     
     if not theme:
         return jsonify({'error': 'Theme not found'}), 404
     
+    limited = check_rate_limit('ai-fallback')
+    if limited:
+        return limited
+    
+    skip_latency_sample()
+    
     # Generate new question with AI
-    ai_question = ai_generator.generate_question(theme['name'], theme['description'])
+    ai_question = ai_generator.generate_question(theme['name'], theme['description'], theme['id'])
     
     if ai_question:
         # Save the AI-generated question
@@ -161,41 +287,23 @@ def get_question(theme_id):
         )
         
         if question_id:
-            # Return the new question
-            conn = get_db_connection()
-            new_question = conn.execute('''
-                SELECT q.*, t.name as theme_name, t.description as theme_description
-                FROM questions q 
-                JOIN themes t ON q.theme_id = t.id 
-                WHERE q.id = ?
-            ''', (question_id,)).fetchone()
-            conn.close()
-            
-            return jsonify(dict(new_question))
+            question_index.load_from_db('q.id = ?', (question_id,))
+            return serve_question(question_id)
     
     return jsonify({'error': 'Could not generate question'}), 500
 
 @app.route('/api/questions/random', methods=['GET'])
 def get_random_question():
     """Get a completely random question from any theme"""
-    conn = get_db_connection()
-    questions = conn.execute('''
-        SELECT q.*, t.name as theme_name, t.description as theme_description
-        FROM questions q 
-        JOIN themes t ON q.theme_id = t.id 
-        ORDER BY RANDOM() 
-        LIMIT 1
-    ''').fetchall()
-    
-    if questions:
-        question = dict(questions[0])
-        # Update usage count
-        conn.execute('UPDATE questions SET times_used = times_used + 1 WHERE id = ?', (question['id'],))
-        conn.commit()
-        conn.close()
-        return jsonify(question)
+    reference = serve_question(question_index.sample())
+    if reference:
+        return reference
+    
+    if question_index.load_from_db():
+        reference = serve_question(question_index.sample())
+        if reference:
+            return reference
     
-    conn.close()
     return jsonify({'error': 'No questions available'}), 404
 
 @app.route('/api/responses', methods=['POST'])
@@ -206,32 +314,52 @@ def save_response():
     if not data or 'question_id' not in data or 'selected_option' not in data:
         return jsonify({'error': 'Missing required fields'}), 400
     
+    try:
+        question_id = int(data['question_id'])
+    except (TypeError, ValueError):
+        return jsonify({'error': 'question_id must be an integer'}), 400
+    
+    if data['selected_option'] not in ('A', 'B'):
+        return jsonify({'error': "selected_option must be 'A' or 'B'"}), 400
+    
     session_id = data.get('session_id', str(uuid.uuid4()))
     user = get_current_user(request)
     user_id = user['id'] if user else None
     
-    conn = get_db_connection()
-    conn.execute('''
-        INSERT INTO user_responses (question_id, selected_option, session_id, user_id)
-        VALUES (?, ?, ?, ?)
-    ''', (data['question_id'], data['selected_option'], session_id, user_id))
-    conn.commit()
-    conn.close()
+    response_store.save(question_id, data['selected_option'], session_id, user_id)
+    
+    tally_broker.publish_vote(question_id, data['selected_option'])
     
     return jsonify({'success': True, 'session_id': session_id})
 
+@app.route('/api/stats/stream', methods=['GET'])
+def stream_question_stats():
+    """Push live tallies for ?question_ids=1,2,3 as server-sent events"""
+    try:
+        question_ids = [int(qid) for qid in request.args.get('question_ids', '').split(',') if qid.strip()]
+    except ValueError:
+        return jsonify({'error': 'question_ids must be a comma separated list of ids'}), 400
+    
+    if not question_ids:
+        return jsonify({'error': 'question_ids required'}), 400
+    
+    if tally_broker.is_full():
+        return jsonify({'error': 'Too many live stats subscribers'}), 503
+    
+    response = Response(tally_broker.stream(question_ids, STATS_STREAM_INTERVAL), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/api/stats/<int:question_id>', methods=['GET'])
 def get_question_stats(question_id):
     """Get statistics for a specific question"""
     conn = get_db_connection()
     
     stats = conn.execute('''
-        SELECT 
-            selected_option,
-            COUNT(*) as count
-        FROM user_responses 
+        SELECT selected_option, count
+        FROM response_tallies 
         WHERE question_id = ?
-        GROUP BY selected_option
     ''', (question_id,)).fetchall()
     
     question = conn.execute('SELECT * FROM questions WHERE id = ?', (question_id,)).fetchone()
@@ -256,6 +384,7 @@ def get_question_stats(question_id):
     return jsonify(result)
 
 @app.route('/api/generate-question', methods=['POST'])
+@rate_limited('generate-question')
 def generate_new_question():
     """Generate a new AI question for a specific theme"""
     data = request.get_json()
@@ -273,7 +402,7 @@ def generate_new_question():
         return jsonify({'error': 'Theme not found'}), 404
     
     # Generate new question with AI
-    ai_question = ai_generator.generate_question(theme['name'], theme['description'])
+    ai_question = ai_generator.generate_question(theme['name'], theme['description'], theme['id'])
     
     if ai_question:
         # Save the AI-generated question
@@ -284,6 +413,7 @@ def generate_new_question():
         )
         
         if question_id:
+            question_index.load_from_db('q.id = ?', (question_id,))
             return jsonify({
                 'success': True,
                 'question_id': question_id,
@@ -293,6 +423,19 @@ def generate_new_question():
     
     return jsonify({'error': 'Could not generate question'}), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Get operational counters for monitoring"""
+    return jsonify({
+        'rate_limiter': rate_limiter.stats(),
+        'load_shedder': load_shedder.stats(),
+        'live_tallies': tally_broker.stats(),
+        'generation_cache': ai_generator.cache_stats(),
+        'question_cache': question_cache.stats(),
+        'jobs': scheduler.stats(),
+        'sql_profiler': sql_profiler_stats.summary() if sql_profiler_stats else None
+    })
+
 # Authentication endpoints
 @app.route('/api/auth/register', methods=['POST'])
 def register():
@@ -0,0 +1,85 @@
+import argparse
+import random
+import time
+
+from question_corpus import QuestionCorpus
+from question_index import QuestionIndex
+
+
+def build_index(num_questions: int, num_themes: int, seed: int) -> QuestionIndex:
+    """Build an index of synthetic questions with varied usage and age"""
+    rng = random.Random(seed)
+    index = QuestionIndex(QuestionCorpus(), rng=random.Random(seed + 1))
+    now = time.time()
+    for question_id in range(1, num_questions + 1):
+        index.add_question(
+            question_id,
+            rng.randrange(num_themes),
+            f"Option A {question_id}",
+            f"Option B {question_id}",
+            times_used=int(rng.expovariate(1 / 20)),
+            created_at=now - rng.uniform(0, 60 * 86400)
+        )
+    return index
+
+
+def distribution_quality(index: QuestionIndex, theme_id: int, samples: int):
+    """Compare observed sampling frequencies with the expected weights"""
+    counts = {}
+    for _ in range(samples):
+        question_id = index.sample(theme_id)
+        counts[question_id] = counts.get(question_id, 0) + 1
+
+    sampler = index._themes[theme_id]
+    total_weight = sum(sampler.tree.weights)
+    chi_square = 0.0
+    total_variation = 0.0
+    for position, weight in zip(sampler.positions, sampler.tree.weights):
+        question_id = index._ids[position]
+        expected = samples * weight / total_weight
+        observed = counts.get(question_id, 0)
+        chi_square += (observed - expected) ** 2 / expected
+        total_variation += abs(observed / samples - weight / total_weight)
+
+    return len(sampler.positions), chi_square, total_variation / 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark freshness-weighted question sampling')
+    parser.add_argument('--questions', type=int, default=1000000)
+    parser.add_argument('--themes', type=int, default=50)
+    parser.add_argument('--samples', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = build_index(args.questions, args.themes, args.seed)
+    build_time = time.perf_counter() - start
+    print(f"Built index of {len(index):,} questions in {args.themes} themes in {build_time:.2f}s")
+
+    start = time.perf_counter()
+    for i in range(args.samples):
+        index.sample(i % args.themes)
+    elapsed = time.perf_counter() - start
+    print(f"Per-theme sampling: {args.samples / elapsed:,.0f} samples/s")
+
+    start = time.perf_counter()
+    for _ in range(args.samples):
+        index.sample()
+    elapsed = time.perf_counter() - start
+    print(f"Any-theme sampling: {args.samples / elapsed:,.0f} samples/s")
+
+    start = time.perf_counter()
+    for _ in range(args.samples):
+        index.record_use(random.randint(1, args.questions))
+    elapsed = time.perf_counter() - start
+    print(f"Weight updates: {args.samples / elapsed:,.0f} updates/s")
+
+    size, chi_square, total_variation = distribution_quality(index, 0, args.samples)
+    print(f"Distribution over theme 0 ({size:,} questions, {args.samples:,} samples):")
+    print(f"  chi-square {chi_square:,.1f} (expected about {size - 1:,} for a correct sampler)")
+    print(f"  total variation distance {total_variation:.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterator, Optional
+
+FIELDS = ['theme', 'option_a', 'option_b', 'theme_description', 'ai_generated']
+
+
+def detect_format(path: str, fmt: Optional[str]) -> str:
+    """Work out whether a question pack is CSV or JSONL"""
+    if fmt:
+        return fmt
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def read_pack(stream, fmt: str) -> Iterator[Dict]:
+    """Stream question records from a CSV or JSONL pack"""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            line = line.strip()
+            if line:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    record = None
+                # Malformed lines and non-object values come through as empty, invalid records
+                yield record if isinstance(record, dict) else {}
+
+
+def _text(value) -> str:
+    """A record field as stripped text (JSONL values may be numbers or null)"""
+    return '' if value is None else str(value).strip()
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+class ProgressReporter:
+    """Print import/export progress to stderr at most once per interval"""
+
+    def __init__(self, label: str, interval: float = 1.0):
+        self.label = label
+        self.interval = interval
+        self.started = time.perf_counter()
+        self._last = 0.0
+
+    def update(self, counts: Dict[str, int], force: bool = False):
+        now = time.perf_counter()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        elapsed = now - self.started
+        rate = counts.get('read', 0) / elapsed if elapsed > 0 else 0
+        details = ', '.join(f"{k} {v:,}" for k, v in counts.items())
+        print(f"{self.label}: {details} ({rate:,.0f} rows/s, {elapsed:.1f}s)", file=sys.stderr)
+
+
+def _deferred_indexes(conn, table: str):
+    """Get the CREATE INDEX statements for a table's explicit indexes"""
+    return conn.execute('''
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL
+    ''', (table,)).fetchall()
+
+
+def import_questions(stream, fmt: str, db_path: str = 'game.db', batch_size: int = 50000) -> Dict[str, int]:
+    """Load a question pack into the questions table, skipping duplicates.
+
+    Missing themes are created as system themes. Indexes on questions are
+    dropped for the duration of the load and rebuilt at the end.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    conn.execute('PRAGMA cache_size = -200000')
+
+    counts = {'read': 0, 'inserted': 0, 'duplicates': 0, 'invalid': 0, 'themes_created': 0}
+    progress = ProgressReporter('Import')
+
+    themes = {name: theme_id for theme_id, name in conn.execute(
+        'SELECT id, name FROM themes WHERE created_by IS NULL')}
+
+    # Hashes of everything already stored, so duplicates never reach the table
+    seen = set()
+    cursor = conn.execute('SELECT theme_id, option_a, option_b FROM questions')
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        seen.update(hash(row) for row in rows)
+
+    indexes = _deferred_indexes(conn, 'questions')
+    conn.execute('BEGIN')
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+
+    try:
+        batch = []
+        for record in read_pack(stream, fmt):
+            counts['read'] += 1
+            theme = _text(record.get('theme'))
+            option_a = _text(record.get('option_a'))
+            option_b = _text(record.get('option_b'))
+            if not theme or not option_a or not option_b:
+                counts['invalid'] += 1
+                continue
+
+            theme_id = themes.get(theme)
+            if theme_id is None:
+                theme_id = conn.execute('''
+                    INSERT INTO themes (name, description, created_by) VALUES (?, ?, NULL)
+                ''', (theme, _text(record.get('theme_description')))).lastrowid
+                themes[theme] = theme_id
+                counts['themes_created'] += 1
+
+            key = hash((theme_id, option_a, option_b))
+            if key in seen:
+                counts['duplicates'] += 1
+                continue
+            seen.add(key)
+
+            batch.append((theme_id, option_a, option_b, _parse_bool(record.get('ai_generated', False))))
+            if len(batch) >= batch_size:
+                conn.executemany('''
+                    INSERT INTO questions (theme_id, option_a, option_b, ai_generated) VALUES (?, ?, ?, ?)
+                ''', batch)
+                counts['inserted'] += len(batch)
+                batch = []
+                conn.execute('COMMIT')
+                conn.execute('BEGIN')
+                progress.update(counts)
+
+        if batch:
+            conn.executemany('''
+                INSERT INTO questions (theme_id, option_a, option_b, ai_generated) VALUES (?, ?, ?, ?)
+            ''', batch)
+            counts['inserted'] += len(batch)
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    finally:
+        # Rebuild deferred indexes even if the load stopped part way
+        for _, sql in indexes:
+            conn.execute(sql.replace('CREATE INDEX', 'CREATE INDEX IF NOT EXISTS', 1))
+        conn.execute('ANALYZE questions')
+        conn.close()
+
+    progress.update(counts, force=True)
+    return counts
+
+
+def export_questions(stream, fmt: str, db_path: str = 'game.db', theme: Optional[str] = None,
+                     batch_size: int = 50000) -> Dict[str, int]:
+    """Stream questions (with their theme) out as a CSV or JSONL pack"""
+    conn = sqlite3.connect(db_path)
+    counts = {'read': 0}
+    progress = ProgressReporter('Export')
+
+    query = '''
+        SELECT t.name, q.option_a, q.option_b, t.description, q.ai_generated
+        FROM questions q
+        JOIN themes t ON q.theme_id = t.id
+    '''
+    params = ()
+    if theme:
+        query += ' WHERE t.name = ?'
+        params = (theme,)
+    query += ' ORDER BY q.id'
+
+    writer = None
+    if fmt == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(FIELDS)
+
+    try:
+        cursor = conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for name, option_a, option_b, description, ai_generated in rows:
+                if writer:
+                    writer.writerow([name, option_a, option_b, description or '', int(bool(ai_generated))])
+                else:
+                    stream.write(json.dumps({
+                        'theme': name,
+                        'option_a': option_a,
+                        'option_b': option_b,
+                        'theme_description': description or '',
+                        'ai_generated': bool(ai_generated)
+                    }) + '\n')
+            counts['read'] += len(rows)
+            progress.update(counts)
+    finally:
+        conn.close()
+
+    progress.update(counts, force=True)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import and export of question packs')
+    parser.add_argument('--db', default='game.db', help='Database path (default: game.db)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Load a CSV/JSONL question pack')
+    import_parser.add_argument('path', help="Pack file, or '-' for stdin")
+    import_parser.add_argument('--format', choices=['csv', 'jsonl'])
+    import_parser.add_argument('--batch-size', type=int, default=50000)
+
+    export_parser = subparsers.add_parser('export', help='Write questions to a CSV/JSONL pack')
+    export_parser.add_argument('path', help="Output file, or '-' for stdout")
+    export_parser.add_argument('--format', choices=['csv', 'jsonl'])
+    export_parser.add_argument('--theme', help='Only export questions from this theme')
+    export_parser.add_argument('--batch-size', type=int, default=50000)
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"Database {args.db} not found, run 'python database.py' first")
+
+    fmt = detect_format(args.path, args.format)
+    if args.command == 'import':
+        stream = sys.stdin if args.path == '-' else open(args.path, newline='', encoding='utf-8')
+        try:
+            import_questions(stream, fmt, args.db, args.batch_size)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+    else:
+        stream = sys.stdout if args.path == '-' else open(args.path, 'w', newline='', encoding='utf-8')
+        try:
+            export_questions(stream, fmt, args.db, args.theme, args.batch_size)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -46,6 +46,11 @@ def init_db():
             FOREIGN KEY (theme_id) REFERENCES themes (id)
         )
     ''')
+    
+    # Questions this worker hasn't indexed yet are looked up by theme
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_questions_theme ON questions (theme_id)
+    ''')
       # Create user_responses table (for analytics)
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS user_responses (
@@ -60,6 +65,22 @@ def init_db():
         )
     ''')
     
+    # Stats look up responses by question
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_responses_question ON user_responses (question_id, selected_option)
+    ''')
+    
+    # Create response_tallies table (vote counts per question; raw responses
+    # are partitioned into monthly files, see response_store.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS response_tallies (
+            question_id INTEGER NOT NULL,
+            selected_option TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (question_id, selected_option)
+        ) WITHOUT ROWID
+    ''')
+    
     # Create user_sessions table for login management
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS user_sessions (
@@ -72,6 +93,28 @@ def init_db():
         )
     ''')
     
+    # Create rate_limit_buckets table (shared token buckets, see rate_limiter.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+            key TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    
+    # Create job_runs table (background job schedule and locks, see scheduler.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_runs (
+            name TEXT PRIMARY KEY,
+            next_run_at REAL NOT NULL,
+            locked_until REAL NOT NULL DEFAULT 0,
+            owner TEXT,
+            last_run_at REAL,
+            last_duration_ms REAL,
+            last_status TEXT
+        )
+    ''')
+    
     # Insert default themes (system themes with created_by = NULL)
     default_themes = [
         ('General', 'General everyday scenarios', None),
@@ -14,6 +14,12 @@ const GamePage = ({ sessionId }) => {
     fetchRandomQuestion();
   }, []);
 
+  // Keep the results live once they are shown
+  useEffect(() => {
+    if (!showResults || !question) return undefined;
+    return api.subscribeToStats([question.id], setStats);
+  }, [showResults, question]);
+
   const fetchRandomQuestion = async () => {
     try {
       setLoading(true);
@@ -19,6 +19,12 @@ const ThemePage = ({ sessionId }) => {
     }
   }, [themeId]);
 
+  // Keep the results live once they are shown
+  useEffect(() => {
+    if (!showResults || !question) return undefined;
+    return api.subscribeToStats([question.id], setStats);
+  }, [showResults, question]);
+
   const fetchQuestionForTheme = async () => {
     try {
       setLoading(true);
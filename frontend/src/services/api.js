@@ -112,13 +112,21 @@ export const api = {
     }
     return response.json();
   },
+  // Get a question by id (immutable, so the browser can cache it)
+  getQuestion: async (questionId) => {
+    const response = await fetch(`${API_BASE_URL}/question/${questionId}`);
+    if (!response.ok) throw new Error('Failed to fetch question');
+    return response.json();
+  },
+
   // Get random question from any theme
   getRandomQuestion: async () => {
     const response = await fetch(`${API_BASE_URL}/questions/random`, {
       headers: getAuthHeaders(),
     });
     if (!response.ok) throw new Error('Failed to fetch random question');
-    return response.json();
+    const { id } = await response.json();
+    return api.getQuestion(id);
   },
 
   // Get question for specific theme
@@ -127,7 +135,8 @@ export const api = {
       headers: getAuthHeaders(),
     });
     if (!response.ok) throw new Error('Failed to fetch question for theme');
-    return response.json();
+    const { id } = await response.json();
+    return api.getQuestion(id);
   },
 
   // Save user response
@@ -157,6 +166,17 @@ export const api = {
     return response.json();
   },
 
+  // Subscribe to live tallies for questions; returns a function that closes the stream
+  subscribeToStats: (questionIds, onUpdate) => {
+    const source = new EventSource(`${API_BASE_URL}/stats/stream?question_ids=${questionIds.join(',')}`);
+    source.addEventListener('tally', (event) => {
+      onUpdate(JSON.parse(event.data));
+    });
+    // Sent when the server has no room for another live subscriber
+    source.addEventListener('unavailable', () => source.close());
+    return () => source.close();
+  },
+
   // Generate new AI question
   generateQuestion: async (themeId) => {
     const response = await fetch(`${API_BASE_URL}/generate-question`, {
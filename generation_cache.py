@@ -0,0 +1,116 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def normalize_theme_key(theme: str, theme_description: str = "") -> str:
+    """Cache key for a theme: case and whitespace differences don't matter"""
+    def clean(text):
+        return re.sub(r'\s+', ' ', (text or '').strip().lower())
+    return f"{clean(theme)}\n{clean(theme_description)}"
+
+
+class GenerationCache:
+    """Bounded LRU cache of generated questions per (theme, description).
+
+    Each key keeps up to max_candidates previously generated questions so a
+    request for a theme can be answered with a candidate that theme hasn't
+    stored yet, instead of another upstream call. The cache is persisted as
+    JSON; with several workers the last one to save wins.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_keys: int = 1000, max_candidates: int = 20):
+        self.path = path
+        self.max_keys = max_keys
+        self.max_candidates = max_candidates
+        self._entries: OrderedDict = OrderedDict()  # key -> list of [option_a, option_b]
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def get_unused(self, theme: str, theme_description: str,
+                   used: Iterable[Tuple[str, str]]) -> Optional[Dict[str, str]]:
+        """Return a cached question not in `used`, counting a hit or a miss"""
+        key = normalize_theme_key(theme, theme_description)
+        used = set(used)
+        with self._lock:
+            candidates = self._entries.get(key)
+            if candidates:
+                self._entries.move_to_end(key)
+                for option_a, option_b in candidates:
+                    if (option_a, option_b) not in used:
+                        self.hits += 1
+                        return {'option_a': option_a, 'option_b': option_b}
+            self.misses += 1
+            return None
+
+    def candidates(self, theme: str, theme_description: str) -> List[Tuple[str, str]]:
+        key = normalize_theme_key(theme, theme_description)
+        with self._lock:
+            return [tuple(c) for c in self._entries.get(key, ())]
+
+    def add(self, theme: str, theme_description: str, question: Dict[str, str]):
+        """Remember a freshly generated question for this theme"""
+        key = normalize_theme_key(theme, theme_description)
+        candidate = [question['option_a'], question['option_b']]
+        with self._lock:
+            candidates = self._entries.setdefault(key, [])
+            self._entries.move_to_end(key)
+            if candidate in candidates:
+                return
+            candidates.append(candidate)
+            if len(candidates) > self.max_candidates:
+                del candidates[0]
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def load(self):
+        """Load persisted entries, if the cache file exists"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not load generation cache: {e}")
+            return
+        with self._lock:
+            for key, candidates in data.get('entries', []):
+                self._entries[key] = [list(c) for c in candidates][-self.max_candidates:]
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        """Write entries to disk if anything changed since the last save"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'entries': list(self._entries.items())}
+            self._dirty = False
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save generation cache: {e}")
+            self._dirty = True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'keys': len(self._entries),
+                'candidates': sum(len(c) for c in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'saved_upstream_calls': self.hits
+            }
@@ -0,0 +1,196 @@
+import json
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Callable returning {question_id: (option_a_count, option_b_count)} from the database
+TallyLoader = Callable[[List[int]], Dict[int, Tuple[int, int]]]
+
+
+def tally_payload(question_id: int, option_a_count: int, option_b_count: int) -> Dict[str, int]:
+    """Tally in the same shape as GET /api/stats/<question_id>"""
+    return {
+        'question_id': question_id,
+        'total_responses': option_a_count + option_b_count,
+        'option_a_count': option_a_count,
+        'option_b_count': option_b_count
+    }
+
+
+class Subscription:
+    """One client's view of the questions it is watching.
+
+    Pending updates are keyed by question id, so a slow client only ever
+    holds the latest tally per question no matter how many votes arrive.
+    """
+
+    def __init__(self, question_ids: Iterable[int]):
+        self.question_ids = set(question_ids)
+        self._pending: Dict[int, Dict[str, int]] = {}
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def push(self, payload: Dict[str, int]):
+        with self._lock:
+            self._pending[payload['question_id']] = payload
+        self._ready.set()
+
+    def wait(self, timeout: float) -> List[Dict[str, int]]:
+        """Wait up to timeout for updates, then take everything pending"""
+        self._ready.wait(timeout)
+        with self._lock:
+            updates = list(self._pending.values())
+            self._pending.clear()
+            self._ready.clear()
+        return updates
+
+
+class TallyBroker:
+    """In-process pub/sub of live vote tallies.
+
+    Tallies are loaded from the database when a question gets its first
+    subscriber and then kept current from published votes. Only votes
+    handled by this process are seen, so with several workers clients
+    should still fall back to GET /api/stats for an authoritative count.
+    """
+
+    def __init__(self, loader: TallyLoader, max_subscribers: int = 1000, max_questions_per_subscriber: int = 50):
+        self.loader = loader
+        self.max_subscribers = max_subscribers
+        self.max_questions_per_subscriber = max_questions_per_subscriber
+        self._tallies: Dict[int, List[int]] = {}
+        self._subscribers: Dict[int, set] = {}  # question_id -> subscriptions
+        self._loading: Set[int] = set()  # questions whose tallies are still being read
+        self._count = 0
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, question_ids: Iterable[int]) -> Optional[Subscription]:
+        """Subscribe to a set of questions, or return None if the broker is full"""
+        question_ids = list(dict.fromkeys(question_ids))[:self.max_questions_per_subscriber]
+        subscription = Subscription(question_ids)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                return None
+            self._count += 1
+            # Register placeholder tallies before reading the database so votes
+            # published during the read are collected rather than dropped
+            missing = []
+            for question_id in question_ids:
+                if question_id not in self._tallies:
+                    self._tallies[question_id] = [0, 0]
+                    self._loading.add(question_id)
+                    missing.append(question_id)
+                self._subscribers.setdefault(question_id, set()).add(subscription)
+
+        try:
+            loaded = self.loader(missing) if missing else {}
+        except Exception:
+            # Give the slot back, or a failing database read would leak it for good
+            with self._lock:
+                self._loading.difference_update(missing)
+            self.unsubscribe(subscription)
+            raise
+
+        pushes = []
+        with self._lock:
+            for question_id in missing:
+                self._loading.discard(question_id)
+                tally = self._tallies[question_id]
+                a, b = loaded.get(question_id, (0, 0))
+                tally[0] += a
+                tally[1] += b
+                # Everyone who subscribed while the read ran is waiting on this tally
+                payload = tally_payload(question_id, tally[0], tally[1])
+                pushes.extend((other, payload) for other in self._subscribers.get(question_id, ()))
+            for question_id in question_ids:
+                if question_id not in missing and question_id not in self._loading:
+                    a, b = self._tallies[question_id]
+                    pushes.append((subscription, tally_payload(question_id, a, b)))
+
+        for target, payload in pushes:
+            target.push(payload)
+        return subscription
+
+    def is_full(self) -> bool:
+        with self._lock:
+            return self._count >= self.max_subscribers
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            self._count -= 1
+            for question_id in subscription.question_ids:
+                subscribers = self._subscribers.get(question_id)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    # Nobody is watching, stop tracking the tally
+                    del self._subscribers[question_id]
+                    self._tallies.pop(question_id, None)
+
+    def publish_vote(self, question_id, selected_option: str):
+        """Record a vote and notify everyone watching the question"""
+        try:
+            question_id = int(question_id)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            tally = self._tallies.get(question_id)
+            if tally is None:
+                return
+            if selected_option == 'A':
+                tally[0] += 1
+            elif selected_option == 'B':
+                tally[1] += 1
+            else:
+                return
+            self.published += 1
+            if question_id in self._loading:
+                # Counted into the placeholder; subscribers get the full tally once loaded
+                return
+            payload = tally_payload(question_id, tally[0], tally[1])
+            subscribers = list(self._subscribers.get(question_id, ()))
+
+        for subscription in subscribers:
+            subscription.push(payload)
+
+    def stream(self, question_ids: Iterable[int], interval: float = 1.0, heartbeat: float = 15.0):
+        """Subscribe and yield server-sent events, at most one batch per interval.
+
+        The subscription is only taken once the response body is iterated, so
+        a response closed before streaming starts never holds a slot.
+        """
+        subscription = self.subscribe(question_ids)
+        if subscription is None:
+            yield f"retry: 15000\nevent: unavailable\ndata: {json.dumps({'error': 'Too many live stats subscribers'})}\n\n"
+            return
+        try:
+            last_sent = time.monotonic()
+            while True:
+                updates = subscription.wait(heartbeat)
+                if updates:
+                    for payload in updates:
+                        yield f"event: tally\ndata: {json.dumps(payload)}\n\n"
+                else:
+                    yield ": keep-alive\n\n"
+
+                # Coalesce: any votes during this pause collapse into one update per question
+                delay = interval - (time.monotonic() - last_sent)
+                if delay > 0:
+                    time.sleep(delay)
+                last_sent = time.monotonic()
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'subscribers': self._count,
+                'watched_questions': len(self._tallies),
+                'published_votes': self.published
+            }
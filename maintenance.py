@@ -0,0 +1,126 @@
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from scheduler import Scheduler
+
+# Themes with fewer questions than this get new ones generated in the background
+MIN_QUESTIONS_PER_THEME = 10
+MAX_GENERATED_PER_RUN = 5
+# Custom themes only get pre-generated questions while people are playing them
+ACTIVE_THEME_DAYS = 7
+
+
+def cleanup_expired_sessions(db_path: str = 'game.db'):
+    """Delete login sessions that have expired"""
+    conn = sqlite3.connect(db_path)
+    deleted = conn.execute("DELETE FROM user_sessions WHERE expires_at <= datetime('now')").rowcount
+    conn.commit()
+    conn.close()
+    if deleted:
+        print(f"Removed {deleted} expired sessions")
+
+
+def cleanup_rate_limit_buckets(db_path: str = 'game.db', max_idle: float = 3600):
+    """Delete shared rate limit buckets that have been idle long enough to be full again"""
+    conn = sqlite3.connect(db_path)
+    conn.execute('DELETE FROM rate_limit_buckets WHERE updated_at < ?', (time.time() - max_idle,))
+    conn.commit()
+    conn.close()
+
+
+def optimize_database(db_path: str = 'game.db'):
+    """Let SQLite refresh query planner statistics where it thinks they are stale"""
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA optimize')
+    conn.close()
+
+
+def analyze_database(db_path: str = 'game.db'):
+    """Rebuild query planner statistics for every table"""
+    conn = sqlite3.connect(db_path)
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+
+
+def vacuum_database(db_path: str = 'game.db'):
+    """Rebuild the database file to reclaim free pages"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute('VACUUM')
+    conn.close()
+
+
+def pregenerate_questions(ai_generator, question_index, response_store, db_path: str = 'game.db'):
+    """Generate questions for themes that are running low, outside of request handlers.
+
+    Only runs with OpenAI configured (the fallback lists would just be copied
+    into every theme), and only for system themes and themes voted on in
+    the last ACTIVE_THEME_DAYS days.
+    """
+    if not ai_generator.ai_enabled():
+        return
+
+    voted = list(response_store.voted_question_ids(datetime.utcnow() - timedelta(days=ACTIVE_THEME_DAYS)))
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    active_themes = set()
+    for start in range(0, len(voted), 500):
+        chunk = voted[start:start + 500]
+        active_themes.update(row[0] for row in conn.execute(f'''
+            SELECT DISTINCT theme_id FROM questions WHERE id IN ({','.join('?' * len(chunk))})
+        ''', chunk))
+
+    themes = [theme for theme in conn.execute('''
+        SELECT t.id, t.name, t.description, t.created_by, COUNT(q.id) as question_count
+        FROM themes t
+        LEFT JOIN questions q ON q.theme_id = t.id
+        GROUP BY t.id
+        HAVING question_count < ?
+        ORDER BY question_count
+    ''', (MIN_QUESTIONS_PER_THEME,)).fetchall()
+        if theme['created_by'] is None or theme['id'] in active_themes]
+
+    generated = 0
+    for theme in themes:
+        if generated >= MAX_GENERATED_PER_RUN:
+            break
+        ai_question = ai_generator.generate_question(theme['name'], theme['description'], theme['id'])
+        if not ai_question:
+            continue
+        # Don't store a question the theme already has
+        if conn.execute('''
+            SELECT 1 FROM questions WHERE theme_id = ? AND option_a = ? AND option_b = ?
+        ''', (theme['id'], ai_question['option_a'], ai_question['option_b'])).fetchone():
+            continue
+        question_id = ai_generator.save_ai_question(theme['id'], ai_question['option_a'], ai_question['option_b'])
+        if question_id:
+            question_index.load_from_db('q.id = ?', (question_id,), db_path=db_path)
+            generated += 1
+    conn.close()
+
+    if generated:
+        print(f"Pre-generated {generated} questions for under-stocked themes")
+
+
+def create_scheduler(ai_generator, question_index, question_usage, response_store) -> Scheduler:
+    """Build the scheduler with all maintenance and warm-up jobs registered"""
+    scheduler = Scheduler()
+
+    # Shared jobs: run by one worker per slot
+    scheduler.add_job('cleanup_expired_sessions', cleanup_expired_sessions, interval=3600, jitter=300, initial_delay=60)
+    scheduler.add_job('cleanup_rate_limit_buckets', cleanup_rate_limit_buckets, interval=3600, jitter=300)
+    scheduler.add_job('optimize_database', optimize_database, interval=3600, jitter=300)
+    scheduler.add_job('analyze_database', analyze_database, cron='30 3 * * *', jitter=600)
+    scheduler.add_job('vacuum_database', vacuum_database, cron='0 4 * * 0', jitter=600)
+    scheduler.add_job('pregenerate_questions', lambda: pregenerate_questions(ai_generator, question_index, response_store),
+                      interval=600, jitter=60, initial_delay=30)
+
+    # Per-worker jobs: reload this process's in-memory corpus and index (new
+    # questions from other workers or bulk imports, and ageing freshness weights),
+    # write buffered usage counts and persist its generation cache
+    scheduler.add_job('rebuild_question_index', question_index.rebuild, interval=900, jitter=60, shared=False)
+    scheduler.add_job('flush_question_usage', question_usage.flush, interval=10, shared=False)
+    scheduler.add_job('save_generation_cache', ai_generator.cache.save, interval=60, jitter=10, shared=False)
+
+    return scheduler
@@ -13,9 +13,13 @@ def migrate_database():
         return
     
     print("Migrating existing database...")
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
     cursor = conn.cursor()
     
+    # Every worker runs this at startup; the write lock makes them take turns,
+    # so only the first one to get it sees (and migrates) the old schema
+    cursor.execute('BEGIN IMMEDIATE')
+    
     # Get list of existing tables
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
     existing_tables = [row[0] for row in cursor.fetchall()]
@@ -107,7 +111,7 @@ def migrate_database():
         cursor.execute('DROP TABLE user_responses')
         cursor.execute('ALTER TABLE user_responses_new RENAME TO user_responses')
     
-    conn.commit()
+    cursor.execute('COMMIT')
     conn.close()
     print("Database migration completed successfully!")
 
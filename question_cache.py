@@ -0,0 +1,51 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class SerializedQuestionCache:
+    """Bounded LRU cache of question JSON bodies and their ETags.
+
+    Questions never change once stored, so entries never need invalidating;
+    the bound only limits memory.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()  # question_id -> (body, etag)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, question_id: int) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(question_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(question_id)
+            self.hits += 1
+            return entry
+
+    def put(self, question_id: int, question: Dict) -> Tuple[bytes, str]:
+        """Serialize a question once and remember the body and its ETag"""
+        body = json.dumps(question, sort_keys=True, separators=(',', ':')).encode()
+        entry = (body, hashlib.sha1(body).hexdigest()[:20])
+        with self._lock:
+            self._entries[question_id] = entry
+            self._entries.move_to_end(question_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
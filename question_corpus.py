@@ -0,0 +1,244 @@
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+# Measured memory per question (including option text) that a loaded corpus
+# must stay under, for the synthetic corpus built by check_budget()
+BYTES_PER_QUESTION_BUDGET = 260
+
+
+class ThemeInfo:
+    """Theme metadata, stored once and shared by all of its questions"""
+
+    __slots__ = ('id', 'name', 'description')
+
+    def __init__(self, theme_id: int, name: str, description: Optional[str]):
+        self.id = theme_id
+        self.name = name
+        self.description = description
+
+
+class QuestionRecord:
+    """A question read out of the corpus"""
+
+    __slots__ = ('id', 'theme', 'option_a', 'option_b', 'ai_generated', 'created_at')
+
+    def __init__(self, question_id, theme, option_a, option_b, ai_generated, created_at):
+        self.id = question_id
+        self.theme = theme
+        self.option_a = option_a
+        self.option_b = option_b
+        self.ai_generated = ai_generated
+        self.created_at = created_at
+
+    def to_dict(self) -> Dict:
+        """Same fields as GET /api/question/<id>"""
+        return {
+            'id': self.id,
+            'theme_id': self.theme.id,
+            'option_a': self.option_a,
+            'option_b': self.option_b,
+            'ai_generated': int(self.ai_generated),
+            'created_at': datetime.fromtimestamp(self.created_at, timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+            'theme_name': self.theme.name,
+            'theme_description': self.theme.description
+        }
+
+
+class QuestionCorpus:
+    """Compact in-memory copy of every question.
+
+    Questions are kept in parallel columns: integer columns in arrays and
+    option text in lists, with identical strings sharing one object. Theme
+    name and description live once in `themes`. Loaded rows are sorted by
+    id and found by binary search; questions added later are appended and
+    found through a small dict, so a question's position never changes
+    until the next load. QuestionIndex samples over these positions.
+    """
+
+    def __init__(self):
+        self.themes: Dict[int, ThemeInfo] = {}
+        self._ids = array('q')
+        self._theme_ids = array('q')
+        self._created = array('q')
+        self._times_used = array('q')
+        self._ai_generated = bytearray()
+        self._option_a = []
+        self._option_b = []
+        self._sorted = 0  # leading positions whose ids are in ascending order
+        self._unsorted: Dict[int, int] = {}  # id -> position for the rest
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def load(self, db_path: str = 'game.db', batch_size: int = 10000):
+        """Stream every theme and question from the database, replacing the current contents"""
+        loaded = QuestionCorpus()
+        # Dedupe repeated option text while loading; the table is dropped
+        # afterwards so it costs nothing once the corpus is built
+        strings = {}
+
+        conn = sqlite3.connect(db_path)
+        try:
+            for theme_id, name, description in conn.execute('SELECT id, name, description FROM themes'):
+                loaded.themes[theme_id] = ThemeInfo(theme_id, name, description)
+
+            # Read in pages, each fully fetched, so no read lock is held across
+            # the whole load; a long-lived read would block every writer
+            last_id = -1
+            while True:
+                rows = conn.execute('''
+                    SELECT id, theme_id, option_a, option_b, ai_generated, times_used,
+                           CAST(strftime('%s', created_at) AS INTEGER)
+                    FROM questions WHERE id > ? ORDER BY id LIMIT ?
+                ''', (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                for question_id, theme_id, option_a, option_b, ai_generated, times_used, created_at in rows:
+                    loaded._ids.append(question_id)
+                    loaded._theme_ids.append(theme_id if theme_id is not None else -1)
+                    loaded._created.append(created_at if created_at is not None else int(time.time()))
+                    loaded._times_used.append(times_used or 0)
+                    loaded._ai_generated.append(1 if ai_generated else 0)
+                    loaded._option_a.append(strings.setdefault(option_a, option_a))
+                    loaded._option_b.append(strings.setdefault(option_b, option_b))
+                # Let request threads run between pages
+                time.sleep(0)
+        finally:
+            conn.close()
+
+        loaded._sorted = len(loaded._ids)
+        self.replace(loaded)
+
+    def replace(self, other: 'QuestionCorpus'):
+        """Take over the contents of another corpus"""
+        with self._lock:
+            self.themes = other.themes
+            self._ids, self._theme_ids, self._created = other._ids, other._theme_ids, other._created
+            self._times_used, self._ai_generated = other._times_used, other._ai_generated
+            self._option_a, self._option_b = other._option_a, other._option_b
+            self._sorted, self._unsorted = other._sorted, other._unsorted
+
+    def columns(self) -> Tuple[array, array, array, array]:
+        """The (ids, theme_ids, created, times_used) columns, indexed by position"""
+        with self._lock:
+            return self._ids, self._theme_ids, self._created, self._times_used
+
+    def add_theme(self, theme_id: int, name: str, description: Optional[str]):
+        with self._lock:
+            if theme_id not in self.themes:
+                self.themes[theme_id] = ThemeInfo(theme_id, name, description)
+
+    def _position(self, question_id: int) -> Optional[int]:
+        position = bisect_left(self._ids, question_id, 0, self._sorted)
+        if position < self._sorted and self._ids[position] == question_id:
+            return position
+        return self._unsorted.get(question_id)
+
+    def position(self, question_id: int) -> Optional[int]:
+        with self._lock:
+            return self._position(question_id)
+
+    def add(self, question_id: int, theme_id: int, option_a: str, option_b: str,
+            ai_generated: bool = False, times_used: int = 0, created_at: Optional[float] = None) -> Optional[int]:
+        """Add a question, returning its position (None if it is already present)"""
+        created = int(time.time() if created_at is None else created_at)
+        with self._lock:
+            if self._position(question_id) is not None:
+                return None
+            position = len(self._ids)
+            # New ids are normally the largest, keeping the sorted run going
+            if self._sorted == position and (not position or question_id > self._ids[-1]):
+                self._sorted += 1
+            else:
+                self._unsorted[question_id] = position
+            self._ids.append(question_id)
+            self._theme_ids.append(theme_id if theme_id is not None else -1)
+            self._created.append(created)
+            self._times_used.append(times_used)
+            self._ai_generated.append(1 if ai_generated else 0)
+            self._option_a.append(option_a)
+            self._option_b.append(option_b)
+            return position
+
+    def get(self, question_id: int) -> Optional[QuestionRecord]:
+        """Look up a question, or None if it (or its theme) isn't loaded"""
+        with self._lock:
+            position = self._position(question_id)
+            if position is None:
+                return None
+            theme = self.themes.get(self._theme_ids[position])
+            if theme is None:
+                return None
+            return QuestionRecord(question_id, theme, self._option_a[position], self._option_b[position],
+                                  bool(self._ai_generated[position]), self._created[position])
+
+
+def _build_synthetic_db(path: str, num_questions: int, num_themes: int = 50):
+    """Create a database of realistic-length questions, some repeated across themes"""
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE themes (id INTEGER PRIMARY KEY, name TEXT, description TEXT)')
+    conn.execute('''
+        CREATE TABLE questions (
+            id INTEGER PRIMARY KEY, theme_id INTEGER, option_a TEXT, option_b TEXT,
+            ai_generated BOOLEAN, times_used INTEGER DEFAULT 0, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.executemany('INSERT INTO themes VALUES (?, ?, ?)',
+                     [(i, f"Theme {i}", f"Questions about theme number {i}") for i in range(num_themes)])
+    conn.executemany('INSERT INTO questions (theme_id, option_a, option_b, ai_generated) VALUES (?, ?, ?, ?)', (
+        (i % num_themes,
+         f"Be able to do thing number {i % (num_questions * 9 // 10)} whenever you like",
+         f"Never have to worry about problem {i} ever again",
+         i % 3 == 0)
+        for i in range(num_questions)))
+    conn.commit()
+    conn.close()
+
+
+def measure_bytes_per_question(num_questions: int = 100000) -> float:
+    """Load a synthetic corpus and measure the memory it holds per question"""
+    import tracemalloc
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'corpus.db')
+        _build_synthetic_db(path, num_questions)
+
+        corpus = QuestionCorpus()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        corpus.load(path)
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+    return (after - before) / len(corpus)
+
+
+def check_budget(num_questions: int = 100000) -> bool:
+    """Check the measured bytes per question against BYTES_PER_QUESTION_BUDGET"""
+    bytes_per_question = measure_bytes_per_question(num_questions)
+    within = bytes_per_question <= BYTES_PER_QUESTION_BUDGET
+    print(f"Question corpus: {bytes_per_question:.1f} bytes/question "
+          f"(budget {BYTES_PER_QUESTION_BUDGET}) - {'OK' if within else 'OVER BUDGET'}")
+    return within
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure question corpus memory use')
+    parser.add_argument('--questions', type=int, default=100000)
+    args = parser.parse_args()
+    sys.exit(0 if check_budget(args.questions) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+import random
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, Optional
+
+from question_corpus import QuestionCorpus
+
+# Questions get a bonus on top of their usage weight while they are new; the
+# bonus halves every FRESHNESS_HALF_LIFE_DAYS so brand new questions are
+# favoured without starving the rest of the theme.
+FRESHNESS_BONUS = 2.0
+FRESHNESS_HALF_LIFE_DAYS = 7.0
+
+
+def freshness_weight(times_used: int, created_at: float, now: Optional[float] = None) -> float:
+    """Sampling weight of a question: inverse to its usage, boosted while it is new"""
+    now = time.time() if now is None else now
+    age_days = max(0.0, now - created_at) / 86400
+    return (1 + FRESHNESS_BONUS * 0.5 ** (age_days / FRESHNESS_HALF_LIFE_DAYS)) / (1 + times_used)
+
+
+class FenwickTree:
+    """Binary indexed tree over weights, supporting O(log n) update and weighted search"""
+
+    def __init__(self, weights=()):
+        self.weights = array('d', weights)
+        # 1-based; built in O(n) by adding each node into the next node covering it
+        self._tree = array('d', [0.0])
+        self._tree.extend(self.weights)
+        for i in range(1, len(self._tree)):
+            parent = i + (i & -i)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[i]
+
+    def __len__(self):
+        return len(self.weights)
+
+    def append(self, weight: float):
+        """Add a new slot at the end, in O(log n)"""
+        self.weights.append(0.0)
+        i = len(self.weights)
+        # The new node covers the range (i - lowbit(i), i]; sum the existing part of it
+        lowbit = i & -i
+        self._tree.append(self.prefix_sum(i - 1) - self.prefix_sum(i - lowbit))
+        self.update(i - 1, weight)
+
+    def update(self, index: int, weight: float):
+        """Set the weight at a 0-based index"""
+        delta = weight - self.weights[index]
+        self.weights[index] = weight
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, count: int) -> float:
+        """Sum of the first `count` weights"""
+        total = 0.0
+        while count > 0:
+            total += self._tree[count]
+            count -= count & -count
+        return total
+
+    def total(self) -> float:
+        return self.prefix_sum(len(self.weights))
+
+    def find(self, target: float) -> int:
+        """Smallest 0-based index whose running weight sum exceeds target"""
+        pos = 0
+        step = 1 << len(self.weights).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] <= target:
+                pos = nxt
+                target -= self._tree[nxt]
+            step >>= 1
+        return min(pos, len(self.weights) - 1)
+
+
+class _Sampler:
+    """Weighted sampler over a set of question positions in the index"""
+
+    def __init__(self, positions=(), weights=()):
+        self.positions = array('q', positions)
+        self.tree = FenwickTree(weights)
+
+    def add(self, position: int, weight: float) -> int:
+        """Add a question and return its slot in this sampler"""
+        self.positions.append(position)
+        self.tree.append(weight)
+        return len(self.positions) - 1
+
+    def sample(self, rng) -> Optional[int]:
+        total = self.tree.total()
+        if not self.positions or total <= 0:
+            return None
+        return self.positions[self.tree.find(rng.random() * total)]
+
+
+class QuestionIndex:
+    """In-memory per-theme index for freshness-weighted question sampling.
+
+    Each worker process keeps its own index over its QuestionCorpus: the
+    samplers hold corpus positions and weights, and ids, themes, ages and
+    usage counts are read from the corpus columns. The index owns the
+    corpus's contents - rebuild() reloads both together and add_question()
+    adds to both - so positions always line up.
+    """
+
+    def __init__(self, corpus: QuestionCorpus, rng=None):
+        self.corpus = corpus
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._uses_during_rebuild: Optional[Dict[int, int]] = None
+        self._attach(FenwickTree(), {}, array('q'))
+
+    def _attach(self, everything, themes, theme_slots):
+        self._ids, self._theme_ids, self._created, self._times_used = self.corpus.columns()
+        self._all = everything           # weights of every question, by corpus position
+        self._themes: Dict[int, _Sampler] = themes
+        self._theme_slots = theme_slots  # slot of each question in its theme's sampler
+
+    def __len__(self):
+        return len(self._all)
+
+    def rebuild(self, db_path: str = 'game.db'):
+        """Reload the corpus from the database and rebuild the samplers over it.
+
+        Serves recorded while the load runs are replayed onto the new
+        samplers, and questions stored since the load read its last page
+        are added straight after the swap, so neither is lost.
+        """
+        with self._lock:
+            self._uses_during_rebuild = {}
+
+        loaded = QuestionCorpus()
+        loaded.load(db_path)
+        ids, theme_ids, created, times_used = loaded.columns()
+
+        now = time.time()
+        weights, theme_slots = array('d'), array('q')
+        theme_positions: Dict[int, array] = {}
+        theme_weights: Dict[int, array] = {}
+        for position in range(len(ids)):
+            theme_id = theme_ids[position]
+            weight = freshness_weight(times_used[position], created[position], now)
+            positions = theme_positions.get(theme_id)
+            if positions is None:
+                positions = theme_positions[theme_id] = array('q')
+                theme_weights[theme_id] = array('d')
+            theme_slots.append(len(positions))
+            positions.append(position)
+            theme_weights[theme_id].append(weight)
+            weights.append(weight)
+
+        themes = {theme_id: _Sampler(positions, theme_weights[theme_id])
+                  for theme_id, positions in theme_positions.items()}
+        everything = FenwickTree(weights)
+        with self._lock:
+            self.corpus.replace(loaded)
+            self._attach(everything, themes, theme_slots)
+            uses, self._uses_during_rebuild = self._uses_during_rebuild, None
+            for question_id, count in uses.items():
+                self._record_use(question_id, count)
+
+        self.load_from_db('q.id > ?', (ids[-1] if ids else 0,), limit=100000, db_path=db_path)
+
+    def add_question(self, question_id: int, theme_id: int, option_a: str, option_b: str,
+                     ai_generated: bool = False, times_used: int = 0, created_at: Optional[float] = None):
+        """Add a question to the corpus and the index"""
+        with self._lock:
+            position = self.corpus.add(question_id, theme_id, option_a, option_b, ai_generated, times_used, created_at)
+            if position is None:
+                return
+            weight = freshness_weight(times_used, self._created[position])
+            sampler = self._themes.get(self._theme_ids[position])
+            if sampler is None:
+                sampler = self._themes[self._theme_ids[position]] = _Sampler()
+            self._theme_slots.append(sampler.add(position, weight))
+            self._all.append(weight)
+
+    def load_from_db(self, where: str = '1 = 1', params: tuple = (), limit: int = 1000, db_path: str = 'game.db') -> int:
+        """Add questions matching a WHERE clause (newest first) that aren't indexed yet.
+
+        Stored values are used as-is, so a question's body is the same
+        whether it is served from memory or from the database.
+        """
+        conn = sqlite3.connect(db_path)
+        try:
+            rows = conn.execute(f'''
+                SELECT q.id, q.theme_id, q.option_a, q.option_b, q.ai_generated, q.times_used,
+                       CAST(strftime('%s', q.created_at) AS INTEGER), t.id, t.name, t.description
+                FROM questions q
+                LEFT JOIN themes t ON q.theme_id = t.id
+                WHERE {where}
+                ORDER BY q.id DESC LIMIT ?
+            ''', tuple(params) + (limit,)).fetchall()
+        finally:
+            conn.close()
+
+        for question_id, theme_id, option_a, option_b, ai_generated, times_used, created_at, found, name, description in rows:
+            if found is not None:
+                self.corpus.add_theme(found, name, description)
+            self.add_question(question_id, theme_id, option_a, option_b, bool(ai_generated), times_used or 0, created_at)
+        return len(rows)
+
+    def record_use(self, question_id: int):
+        """Count a serve of a question and lower its weight accordingly"""
+        with self._lock:
+            if self._uses_during_rebuild is not None:
+                self._uses_during_rebuild[question_id] = self._uses_during_rebuild.get(question_id, 0) + 1
+            self._record_use(question_id)
+
+    def _record_use(self, question_id: int, count: int = 1):
+        position = self.corpus.position(question_id)
+        if position is None:
+            return
+        self._times_used[position] += count
+        weight = freshness_weight(self._times_used[position], self._created[position])
+        self._themes[self._theme_ids[position]].tree.update(self._theme_slots[position], weight)
+        self._all.update(position, weight)
+
+    def sample(self, theme_id: Optional[int] = None) -> Optional[int]:
+        """Pick a question id, from one theme or from all questions if theme_id is None"""
+        with self._lock:
+            if theme_id is None:
+                total = self._all.total()
+                if total <= 0:
+                    return None
+                return self._ids[self._all.find(self.rng.random() * total)]
+            sampler = self._themes.get(theme_id)
+            if sampler is None:
+                return None
+            position = sampler.sample(self.rng)
+            return None if position is None else self._ids[position]
+
+    def weight(self, question_id: int) -> float:
+        """Current sampling weight of a question (0 if it is not indexed)"""
+        with self._lock:
+            position = self.corpus.position(question_id)
+            if position is None:
+                return 0.0
+            return self._all.weights[position]
+
+
+class UsageCounter:
+    """Buffers times_used increments so serving a question doesn't write to the database.
+
+    Pending counts are written in one batch by flush(), which the scheduler
+    calls every few seconds, or the request path via flush_if_due() when the
+    scheduler is disabled.
+    """
+
+    def __init__(self):
+        self._pending: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, question_id: int):
+        with self._lock:
+            self._pending[question_id] = self._pending.get(question_id, 0) + 1
+
+    def flush_if_due(self, interval: float = 10.0, db_path: str = 'game.db'):
+        """Flush if the last flush was at least interval seconds ago (for when no scheduler runs flush)"""
+        with self._lock:
+            if time.monotonic() - self._last_flush < interval:
+                return
+        self.flush(db_path)
+
+    def flush(self, db_path: str = 'game.db'):
+        """Write all pending increments in a single transaction"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        conn = None
+        try:
+            conn = sqlite3.connect(db_path, timeout=10)
+            conn.executemany('UPDATE questions SET times_used = times_used + ? WHERE id = ?',
+                             [(count, question_id) for question_id, count in pending.items()])
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error flushing question usage: {e}")
+            # Keep the counts for the next flush rather than losing them
+            with self._lock:
+                for question_id, count in pending.items():
+                    self._pending[question_id] = self._pending.get(question_id, 0) + count
+        finally:
+            if conn is not None:
+                conn.close()
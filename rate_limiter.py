@@ -0,0 +1,258 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import g, jsonify, request
+
+# Limits are (burst capacity, period in seconds): a client may make `capacity`
+# calls back to back and then regains one token every period / capacity seconds.
+DEFAULT_LIMITS = {
+    'generate-question': {'ip': (5, 60), 'user': (10, 60), 'endpoint': (120, 60)},
+    'ai-fallback': {'ip': (10, 60), 'user': (20, 60), 'endpoint': (240, 60)},
+}
+
+
+class TokenBucketStore:
+    """Bounded in-process token buckets, evicting the least recently used key"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, last refill time)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, period: float) -> Tuple[bool, float]:
+        """Take one token from a bucket, returning (allowed, retry_after_seconds)"""
+        refill_rate = capacity / period
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = float(capacity)
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill_rate)
+                self._buckets.move_to_end(key)
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return allowed, 0.0 if allowed else (1 - tokens) / refill_rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteTokenBucketStore:
+    """Token buckets shared between worker processes through the database"""
+
+    def __init__(self, db_path: str = 'game.db'):
+        self.db_path = db_path
+
+    def take(self, key: str, capacity: int, period: float) -> Tuple[bool, float]:
+        """Take one token from a bucket, returning (allowed, retry_after_seconds)"""
+        refill_rate = capacity / period
+        now = time.time()
+        conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('''
+                SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?
+            ''', (key,)).fetchone()
+
+            if row is None:
+                tokens = float(capacity)
+            else:
+                tokens = min(capacity, row[0] + max(0.0, now - row[1]) * refill_rate)
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+
+            conn.execute('''
+                INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at)
+                VALUES (?, ?, ?)
+            ''', (key, tokens, now))
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            # Fail open: a locked or missing table should not take the API down
+            print(f"Rate limit storage error: {e}")
+            return True, 0.0
+        finally:
+            conn.close()
+
+        return allowed, 0.0 if allowed else (1 - tokens) / refill_rate
+
+    def __len__(self):
+        return 0
+
+
+class RateLimiter:
+    """Per-IP, per-user and per-endpoint token bucket rate limiting"""
+
+    def __init__(self, store=None, limits: Optional[Dict[str, Dict[str, Tuple[int, float]]]] = None):
+        self.store = store if store is not None else TokenBucketStore()
+        self.limits = limits if limits is not None else DEFAULT_LIMITS
+        self.allowed = 0
+        self.limited = 0
+
+    def check(self, endpoint: str, ip: Optional[str], user_id: Optional[int] = None) -> Tuple[bool, float]:
+        """Check every bucket that applies to this call, returning (allowed, retry_after_seconds)"""
+        limits = self.limits.get(endpoint)
+        if not limits:
+            return True, 0.0
+
+        keys = []
+        if 'ip' in limits and ip:
+            keys.append(('ip', f"ip:{ip}:{endpoint}"))
+        if 'user' in limits and user_id is not None:
+            keys.append(('user', f"user:{user_id}:{endpoint}"))
+        if 'endpoint' in limits:
+            keys.append(('endpoint', f"endpoint:{endpoint}"))
+
+        for scope, key in keys:
+            capacity, period = limits[scope]
+            allowed, retry_after = self.store.take(key, capacity, period)
+            if not allowed:
+                self.limited += 1
+                return False, retry_after
+
+        self.allowed += 1
+        return True, 0.0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'allowed': self.allowed,
+            'limited': self.limited,
+            'tracked_keys': len(self.store),
+        }
+
+
+class LoadShedder:
+    """Reject requests early when too many are in flight or latency is too high"""
+
+    def __init__(self, max_in_flight: int = 64, max_latency_ms: float = 2000, half_life: float = 5.0):
+        self.max_in_flight = max_in_flight
+        self.max_latency_ms = max_latency_ms
+        self.half_life = half_life
+        self.in_flight = 0
+        self.shed = 0
+        self._latency_ms = 0.0
+        self._latency_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _current_latency(self, now: float) -> float:
+        # Decay towards zero while nothing completes, so shedding cannot
+        # lock itself in once every new request is being rejected
+        return self._latency_ms * 0.5 ** ((now - self._latency_at) / self.half_life)
+
+    def enter(self) -> Optional[str]:
+        """Admit a request, or return the reason it should be shed"""
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.shed += 1
+                return 'Server is at capacity'
+            if self._current_latency(time.monotonic()) > self.max_latency_ms:
+                self.shed += 1
+                return 'Server is overloaded'
+            self.in_flight += 1
+            return None
+
+    def exit(self, elapsed_ms: float, sample: bool = True):
+        """Mark an admitted request as finished and record its latency (unless sample is False)"""
+        with self._lock:
+            self.in_flight -= 1
+            if not sample:
+                return
+            now = time.monotonic()
+            self._latency_ms = 0.8 * self._current_latency(now) + 0.2 * elapsed_ms
+            self._latency_at = now
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'in_flight': self.in_flight,
+                'shed': self.shed,
+                'latency_ms': round(self._current_latency(time.monotonic()), 2),
+            }
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the rate limiter, sharing buckets through the database if configured"""
+    if os.getenv('RATE_LIMIT_STORAGE', 'memory') == 'sqlite':
+        return RateLimiter(SQLiteTokenBucketStore())
+    return RateLimiter(TokenBucketStore(int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))))
+
+
+def trusted_proxy_hops() -> int:
+    """Number of reverse proxies in front of the app (TRUST_PROXY_HEADERS), 0 if none"""
+    value = os.getenv('TRUST_PROXY_HEADERS', '').strip().lower()
+    if value in ('', '0', 'false', 'off'):
+        return 0
+    try:
+        return max(0, int(value))
+    except ValueError:
+        return 1
+
+
+def client_ip() -> Optional[str]:
+    """Get the client address, honouring X-Forwarded-For only behind a trusted proxy.
+
+    Clients can put anything in X-Forwarded-For, so only the entry appended
+    by our own outermost proxy (the Nth from the right) is trusted.
+    """
+    hops = trusted_proxy_hops()
+    forwarded = request.headers.get('X-Forwarded-For', '')
+    route = [addr.strip() for addr in forwarded.split(',') if addr.strip()]
+    if hops and len(route) >= hops:
+        return route[-hops]
+    return request.remote_addr
+
+
+def rate_limit_exceeded(retry_after: float):
+    response = jsonify({'error': 'Rate limit exceeded, please slow down'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response
+
+
+def skip_latency_sample():
+    """Leave the current request out of the load shedder's latency average.
+
+    For requests that are slow by design, such as ones waiting on OpenAI,
+    which would otherwise push the average up and shed every other endpoint.
+    """
+    g.load_shedder_sample = False
+
+
+def init_load_shedding(app, shedder: LoadShedder, exempt_endpoints: Iterable[str] = ()):
+    """Register request hooks that shed load with a fast 503.
+
+    Requests to exempt_endpoints still count towards the in-flight limit but
+    not towards the latency average.
+    """
+    exempt_endpoints = frozenset(exempt_endpoints)
+
+    @app.before_request
+    def _admit_request():
+        g.load_shedder_admitted = False
+        reason = shedder.enter()
+        if reason:
+            response = jsonify({'error': reason})
+            response.status_code = 503
+            response.headers['Retry-After'] = '1'
+            return response
+        g.load_shedder_admitted = True
+        g.load_shedder_started = time.monotonic()
+
+    @app.teardown_request
+    def _release_request(exc):
+        if g.get('load_shedder_admitted'):
+            sample = g.get('load_shedder_sample', True) and request.endpoint not in exempt_endpoints
+            shedder.exit((time.monotonic() - g.load_shedder_started) * 1000, sample)
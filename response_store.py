@@ -0,0 +1,245 @@
+import argparse
+import glob
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+PARTITION_PATTERN = re.compile(r'responses_(\d{4})_(\d{2})\.db$')
+
+
+class ResponseStore:
+    """Vote storage split into monthly SQLite files.
+
+    Each vote is written to the partition for the current (UTC) month,
+    which is attached to the main database connection so the raw row and
+    the per-question count in response_tallies commit together. Stats read
+    only response_tallies, so their cost doesn't grow with the number of
+    votes, and old partitions can be archived without touching the counts.
+    Responses stored before partitioning stay in the main user_responses
+    table and are included in fan-out queries.
+    """
+
+    def __init__(self, main_db: str = 'game.db', base_dir: str = 'responses'):
+        self.main_db = main_db
+        self.base_dir = base_dir
+        self.archive_dir = os.path.join(base_dir, 'archive')
+        self._ready_partitions = set()
+        self._lock = threading.Lock()
+
+    def partition_name(self, moment: Optional[datetime] = None) -> str:
+        moment = moment or datetime.utcnow()
+        return f"responses_{moment.year:04d}_{moment.month:02d}"
+
+    def partition_path(self, name: str) -> str:
+        return os.path.join(self.base_dir, f"{name}.db")
+
+    def partitions(self) -> List[str]:
+        """Paths of the live (not archived) partitions, oldest first"""
+        return sorted(glob.glob(os.path.join(self.base_dir, 'responses_*.db')))
+
+    def _attach(self, conn, path: str, alias: str = 'part'):
+        conn.execute('ATTACH DATABASE ? AS ' + alias, (path,))
+        with self._lock:
+            if path in self._ready_partitions:
+                return
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {alias}.user_responses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                question_id INTEGER,
+                selected_option TEXT,
+                session_id TEXT,
+                user_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute(f'''
+            CREATE INDEX IF NOT EXISTS {alias}.idx_user_responses_question
+            ON user_responses (question_id, selected_option)
+        ''')
+        conn.commit()
+        with self._lock:
+            self._ready_partitions.add(path)
+
+    def ensure_tallies(self):
+        """Backfill response_tallies from pre-partitioning responses, once"""
+        conn = sqlite3.connect(self.main_db, timeout=30, isolation_level=None)
+        try:
+            # Several workers may start at once; the write lock makes one of
+            # them backfill while the rest wait and then find the table filled
+            conn.execute('BEGIN IMMEDIATE')
+            if not conn.execute('SELECT 1 FROM response_tallies LIMIT 1').fetchone():
+                conn.execute('''
+                    INSERT OR IGNORE INTO response_tallies (question_id, selected_option, count)
+                    SELECT question_id, selected_option, COUNT(*)
+                    FROM user_responses
+                    WHERE question_id IS NOT NULL AND selected_option IS NOT NULL
+                    GROUP BY question_id, selected_option
+                ''')
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+    def save(self, question_id, selected_option: str, session_id: str, user_id: Optional[int]):
+        """Store a vote in the current partition and bump its tally"""
+        os.makedirs(self.base_dir, exist_ok=True)
+        conn = sqlite3.connect(self.main_db, timeout=10)
+        try:
+            self._attach(conn, self.partition_path(self.partition_name()))
+            conn.execute('''
+                INSERT INTO part.user_responses (question_id, selected_option, session_id, user_id)
+                VALUES (?, ?, ?, ?)
+            ''', (question_id, selected_option, session_id, user_id))
+            conn.execute('''
+                INSERT INTO main.response_tallies (question_id, selected_option, count) VALUES (?, ?, 1)
+                ON CONFLICT (question_id, selected_option) DO UPDATE SET count = count + 1
+            ''', (question_id, selected_option))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_tallies(self, question_ids: List[int]) -> Dict[int, Tuple[int, int]]:
+        """Get (option_a_count, option_b_count) for each of the given questions"""
+        if not question_ids:
+            return {}
+        conn = sqlite3.connect(self.main_db)
+        placeholders = ','.join('?' * len(question_ids))
+        rows = conn.execute(f'''
+            SELECT question_id, selected_option, count
+            FROM response_tallies
+            WHERE question_id IN ({placeholders})
+        ''', list(question_ids)).fetchall()
+        conn.close()
+
+        tallies = {}
+        for question_id, selected_option, count in rows:
+            a, b = tallies.get(question_id, (0, 0))
+            if selected_option == 'A':
+                a = count
+            elif selected_option == 'B':
+                b = count
+            tallies[question_id] = (a, b)
+        return tallies
+
+    def fan_out(self, where: str = '1 = 1', params: tuple = ()) -> Iterator[sqlite3.Row]:
+        """Yield raw responses matching a WHERE clause from every live partition, oldest first"""
+        for path in [self.main_db] + self.partitions():
+            conn = sqlite3.connect(path)
+            conn.row_factory = sqlite3.Row
+            try:
+                cursor = conn.execute(f'''
+                    SELECT id, question_id, selected_option, session_id, user_id, created_at
+                    FROM user_responses WHERE {where}
+                    ORDER BY id
+                ''', params)
+                while True:
+                    rows = cursor.fetchmany(1000)
+                    if not rows:
+                        break
+                    yield from rows
+            finally:
+                conn.close()
+
+    def voted_question_ids(self, since: datetime) -> Set[int]:
+        """Ids of questions voted on since a (UTC) time, from the partitions covering it"""
+        question_ids = set()
+        for path in self.partitions():
+            match = PARTITION_PATTERN.search(path)
+            if not match or (int(match.group(1)), int(match.group(2))) < (since.year, since.month):
+                continue
+            conn = sqlite3.connect(path)
+            try:
+                rows = conn.execute('''
+                    SELECT DISTINCT question_id FROM user_responses WHERE created_at >= ?
+                ''', (since.strftime('%Y-%m-%d %H:%M:%S'),)).fetchall()
+            finally:
+                conn.close()
+            question_ids.update(row[0] for row in rows if row[0] is not None)
+        return question_ids
+
+    def archive_before(self, cutoff: str) -> List[str]:
+        """Move partitions for months before cutoff ('YYYY-MM') into the archive directory.
+
+        Archived votes stay counted in response_tallies but no longer appear
+        in fan-out queries.
+        """
+        year, month = (int(part) for part in cutoff.split('-'))
+        current = self.partition_path(self.partition_name())
+        os.makedirs(self.archive_dir, exist_ok=True)
+        moved = []
+        for path in self.partitions():
+            match = PARTITION_PATTERN.search(path)
+            if not match or path == current or (int(match.group(1)), int(match.group(2))) >= (year, month):
+                continue
+            destination = os.path.join(self.archive_dir, os.path.basename(path))
+            shutil.move(path, destination)
+            with self._lock:
+                self._ready_partitions.discard(path)
+            moved.append(destination)
+        return moved
+
+    def migrate_legacy(self, batch_size: int = 10000) -> int:
+        """Move pre-partitioning rows out of the main database into monthly partitions"""
+        os.makedirs(self.base_dir, exist_ok=True)
+        self.ensure_tallies()
+        conn = sqlite3.connect(self.main_db, timeout=30)
+        moved = 0
+        try:
+            while True:
+                rows = conn.execute('''
+                    SELECT id, question_id, selected_option, session_id, user_id, created_at
+                    FROM user_responses ORDER BY id LIMIT ?
+                ''', (batch_size,)).fetchall()
+                if not rows:
+                    break
+                by_partition = {}
+                for row in rows:
+                    try:
+                        created = datetime.strptime(str(row[5])[:19], '%Y-%m-%d %H:%M:%S')
+                    except ValueError:
+                        created = datetime.utcnow()
+                    by_partition.setdefault(self.partition_name(created), []).append(row)
+                for name, partition_rows in by_partition.items():
+                    # Copy and delete in one transaction so a crash never loses or duplicates rows
+                    self._attach(conn, self.partition_path(name))
+                    conn.executemany('''
+                        INSERT INTO part.user_responses (question_id, selected_option, session_id, user_id, created_at)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', [row[1:] for row in partition_rows])
+                    conn.executemany('DELETE FROM main.user_responses WHERE id = ?', [(row[0],) for row in partition_rows])
+                    conn.commit()
+                    conn.execute('DETACH DATABASE part')
+                moved += len(rows)
+                print(f"Moved {moved:,} responses into partitions")
+        finally:
+            conn.close()
+        return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage partitioned response storage')
+    parser.add_argument('--db', default='game.db')
+    parser.add_argument('--dir', default=os.getenv('RESPONSES_DIR', 'responses'))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help='List live partitions')
+    archive_parser = subparsers.add_parser('archive', help='Archive partitions older than a month')
+    archive_parser.add_argument('before', help="First month to keep, as YYYY-MM")
+    subparsers.add_parser('migrate-legacy', help='Move responses from game.db into partitions')
+    args = parser.parse_args()
+
+    store = ResponseStore(args.db, args.dir)
+    if args.command == 'list':
+        for path in store.partitions():
+            print(f"{path}\t{os.path.getsize(path):,} bytes")
+    elif args.command == 'archive':
+        for path in store.archive_before(args.before):
+            print(f"Archived {path}")
+    else:
+        store.migrate_legacy()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+
+
+class CronSchedule:
+    """Minimal 5-field cron expression: minute hour day-of-month month day-of-week.
+
+    Fields support `*`, numbers, ranges (`1-5`), lists (`1,15`) and steps
+    (`*/10`). Day-of-week uses 0 for Sunday. Times are local.
+    """
+
+    RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.RANGES)
+        ]
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_text = part.split('/', 1)
+                step = int(step_text)
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(v) for v in part.split('-', 1))
+            else:
+                start = end = int(part)
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid cron field: {field!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        # Standard cron: if both are restricted, either one matching is enough
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after the given time"""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+
+class Job:
+    """A scheduled task plus its timing metrics"""
+
+    def __init__(self, name: str, func: Callable[[], None], interval: Optional[float] = None,
+                 cron: Optional[str] = None, jitter: float = 0.0, initial_delay: Optional[float] = None,
+                 shared: bool = True, lease: float = 3600.0):
+        if (interval is None) == (cron is None):
+            raise ValueError(f"Job {name} needs exactly one of interval or cron")
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.cron = CronSchedule(cron) if cron else None
+        self.jitter = jitter
+        self.shared = shared
+        self.lease = lease
+        if initial_delay is None:
+            self.next_run = self.next_run_after(time.time())
+        else:
+            self.next_run = time.time() + initial_delay
+
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_run_at = None
+        self.last_duration_ms = None
+        self.total_duration_ms = 0.0
+        self.last_error = None
+
+    def next_run_after(self, now: float) -> float:
+        """When the job should next run, including random jitter"""
+        if self.cron:
+            base = self.cron.next_after(datetime.fromtimestamp(now)).timestamp()
+        else:
+            base = now + self.interval
+        return base + random.uniform(0, self.jitter)
+
+    def stats(self) -> Dict:
+        return {
+            'schedule': self.cron.expression if self.cron else f"every {self.interval:g}s",
+            'next_run_at': datetime.fromtimestamp(self.next_run).isoformat(timespec='seconds'),
+            'runs': self.runs,
+            'failures': self.failures,
+            'skipped': self.skipped,
+            'last_run_at': self.last_run_at,
+            'last_duration_ms': self.last_duration_ms,
+            'avg_duration_ms': round(self.total_duration_ms / self.runs, 2) if self.runs else None,
+            'last_error': self.last_error
+        }
+
+
+class Scheduler:
+    """In-process background job runner.
+
+    Shared jobs are claimed through the job_runs table, so when several
+    worker processes run a scheduler each job still runs once per slot.
+    Jobs created with shared=False run in every process (e.g. refreshing
+    in-memory caches).
+    """
+
+    def __init__(self, db_path: str = 'game.db', tick: float = 5.0):
+        self.db_path = db_path
+        self.tick = tick
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.jobs: List[Job] = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_job(self, name: str, func: Callable[[], None], **kwargs) -> Job:
+        job = Job(name, func, **kwargs)
+        self.jobs.append(job)
+        return job
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_pending()
+            self._stop.wait(self.tick)
+
+    def run_pending(self):
+        """Run every job that is due"""
+        now = time.time()
+        for job in self.jobs:
+            if job.next_run <= now and not self._stop.is_set():
+                self._run_job(job, now)
+
+    def _run_job(self, job: Job, now: float):
+        if job.shared and not self._claim(job, now):
+            job.skipped += 1
+            return
+
+        started = time.perf_counter()
+        status = 'ok'
+        try:
+            job.func()
+        except Exception as e:
+            status = 'failed'
+            job.failures += 1
+            job.last_error = str(e)
+            print(f"Scheduled job {job.name} failed: {e}")
+            traceback.print_exc()
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        job.runs += 1
+        job.last_run_at = datetime.now().isoformat(timespec='seconds')
+        job.last_duration_ms = round(duration_ms, 2)
+        job.total_duration_ms += duration_ms
+        job.next_run = job.next_run_after(time.time())
+
+        if job.shared:
+            self._release(job, duration_ms, status)
+
+    def _claim(self, job: Job, now: float) -> bool:
+        """Take the job's slot in the database, or sync with the worker that did"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            conn.execute('''
+                INSERT OR IGNORE INTO job_runs (name, next_run_at, locked_until) VALUES (?, ?, 0)
+            ''', (job.name, job.next_run))
+            claimed = conn.execute('''
+                UPDATE job_runs SET owner = ?, locked_until = ?
+                WHERE name = ? AND next_run_at <= ? AND locked_until < ?
+            ''', (self.owner, now + job.lease, job.name, now, now)).rowcount == 1
+            if not claimed:
+                row = conn.execute('SELECT next_run_at FROM job_runs WHERE name = ?', (job.name,)).fetchone()
+                # Another worker ran (or is running) it; wait for its next slot
+                job.next_run = max(row[0], now + self.tick) if row else job.next_run_after(now)
+            conn.commit()
+            return claimed
+        except sqlite3.Error as e:
+            print(f"Could not claim job {job.name}: {e}")
+            job.next_run = now + self.tick
+            return False
+        finally:
+            conn.close()
+
+    def _release(self, job: Job, duration_ms: float, status: str):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            conn.execute('''
+                UPDATE job_runs
+                SET next_run_at = ?, locked_until = 0, last_run_at = ?, last_duration_ms = ?, last_status = ?
+                WHERE name = ? AND owner = ?
+            ''', (job.next_run, time.time(), duration_ms, status, job.name, self.owner))
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Could not release job {job.name}: {e}")
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict[str, Dict]:
+        return {job.name: job.stats() for job in self.jobs}
@@ -0,0 +1,309 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from flask import g, request
+
+# Maximum queries each endpoint may run per request. Requests above budget are
+# reported, and fail in strict mode (SQL_PROFILE=strict) so CI catches them.
+DEFAULT_QUERY_BUDGET = 10
+QUERY_BUDGETS = {
+    'get_themes': 2,
+    'create_theme': 3,
+    'get_question': 7,
+    'get_random_question': 2,
+    'get_question_by_id': 1,
+    'save_response': 6,
+    'get_question_stats': 3,
+    'stream_question_stats': 3,
+    'generate_new_question': 5,
+    'register': 5,
+    'login': 3,
+    'logout': 2,
+    'get_current_user_info': 2,
+    'get_metrics': 0,
+}
+
+# Statements repeated this many times in one request are reported as likely N+1 queries
+REPEAT_THRESHOLD = 3
+
+_original_connect = sqlite3.connect
+_local = threading.local()
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in strict mode when a request runs more queries than its budget"""
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse a statement to its shape: literals become ?, whitespace is squashed"""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    sql = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(...)', sql)
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+class QueryRecord:
+    __slots__ = ('sql', 'params', 'db_path', 'duration_ms', 'rows')
+
+    def __init__(self, sql, params, db_path):
+        self.sql = sql
+        self.params = params
+        self.db_path = db_path
+        self.duration_ms = 0.0
+        self.rows = 0
+
+
+class RequestProfile:
+    """Every statement run while the profile is active"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.queries: List[QueryRecord] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(q.duration_ms for q in self.queries)
+
+    def repeated(self) -> Dict[str, int]:
+        """Normalized statements run at least REPEAT_THRESHOLD times"""
+        counts = Counter(normalize_sql(q.sql) for q in self.queries)
+        return {sql: n for sql, n in counts.items() if n >= REPEAT_THRESHOLD}
+
+    def unindexed(self) -> Dict[str, List[str]]:
+        """Normalized statements whose query plan scans a whole table"""
+        flagged = {}
+        for query in self.queries:
+            sql = normalize_sql(query.sql)
+            if sql in flagged:
+                continue
+            scans = explain_scans(query)
+            if scans:
+                flagged[sql] = scans
+        return flagged
+
+
+_plan_cache: Dict[str, List[str]] = {}
+
+
+def explain_scans(query: QueryRecord) -> List[str]:
+    """Full table scans in a statement's query plan (cached per statement shape)"""
+    verb = query.sql.lstrip().split(None, 1)[0].upper() if query.sql.strip() else ''
+    if verb not in ('SELECT', 'UPDATE', 'DELETE', 'WITH') or query.params is None:
+        return []
+
+    key = normalize_sql(query.sql)
+    if key not in _plan_cache:
+        conn = _original_connect(query.db_path)
+        try:
+            plan = conn.execute('EXPLAIN QUERY PLAN ' + query.sql, query.params).fetchall()
+            _plan_cache[key] = [
+                row[3] for row in plan
+                if row[3].startswith('SCAN') and 'INDEX' not in row[3]
+                and 'INTEGER PRIMARY KEY' not in row[3] and 'CONSTANT ROW' not in row[3]
+            ]
+        except sqlite3.Error:
+            _plan_cache[key] = []
+        finally:
+            conn.close()
+    return _plan_cache[key]
+
+
+def _active_profile() -> Optional[RequestProfile]:
+    return getattr(_local, 'profile', None)
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor that records statement text, time and row count into the active profile"""
+
+    _record = None
+
+    def _start(self, sql, params):
+        profile = _active_profile()
+        if profile is None:
+            self._record = None
+            return None
+        self._record = QueryRecord(sql, params, self.connection.db_path)
+        profile.queries.append(self._record)
+        return time.perf_counter()
+
+    def _finish(self, started, rows=0):
+        if self._record is not None and started is not None:
+            self._record.duration_ms += (time.perf_counter() - started) * 1000
+            self._record.rows += rows
+
+    def execute(self, sql, parameters=()):
+        started = self._start(sql, parameters)
+        result = super().execute(sql, parameters)
+        self._finish(started, max(self.rowcount, 0))
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        started = self._start(sql, None)
+        result = super().executemany(sql, seq_of_parameters)
+        self._finish(started, max(self.rowcount, 0))
+        return result
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._finish(started, 1 if row is not None else 0)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(size if size is not None else self.arraysize)
+        self._finish(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._finish(started, len(rows))
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        row = super().__next__()
+        self._finish(started, 1)
+        return row
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """Connection whose statements all go through ProfiledCursor"""
+
+    def __init__(self, database, *args, **kwargs):
+        super().__init__(database, *args, **kwargs)
+        self.db_path = database
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _profiled_connect(database, *args, **kwargs):
+    kwargs.setdefault('factory', ProfiledConnection)
+    return _original_connect(database, *args, **kwargs)
+
+
+def install():
+    """Make every sqlite3.connect() in the process return a profiled connection"""
+    sqlite3.connect = _profiled_connect
+
+
+@contextmanager
+def profile(name: str = 'block'):
+    """Record every statement run on this thread inside the block"""
+    previous = _active_profile()
+    _local.profile = RequestProfile(name)
+    try:
+        yield _local.profile
+    finally:
+        _local.profile = previous
+
+
+class ProfilerStats:
+    """Per-endpoint query counts across profiled requests"""
+
+    def __init__(self):
+        self._endpoints: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def add(self, result: RequestProfile, over_budget: bool, repeated: int, unindexed: int):
+        with self._lock:
+            stats = self._endpoints.setdefault(result.name, {
+                'requests': 0, 'queries': 0, 'max_queries': 0, 'total_ms': 0.0,
+                'over_budget': 0, 'repeated': 0, 'unindexed': 0
+            })
+            stats['requests'] += 1
+            stats['queries'] += result.count
+            stats['max_queries'] = max(stats['max_queries'], result.count)
+            stats['total_ms'] += result.total_ms
+            stats['over_budget'] += int(over_budget)
+            stats['repeated'] += repeated
+            stats['unindexed'] += unindexed
+
+    def summary(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                name: {
+                    'requests': s['requests'],
+                    'avg_queries': round(s['queries'] / s['requests'], 2),
+                    'max_queries': s['max_queries'],
+                    'avg_ms': round(s['total_ms'] / s['requests'], 3),
+                    'over_budget': s['over_budget'],
+                    'repeated': s['repeated'],
+                    'unindexed': s['unindexed'],
+                    'budget': QUERY_BUDGETS.get(name, DEFAULT_QUERY_BUDGET)
+                } for name, s in self._endpoints.items()
+            }
+
+
+def init_sql_profiling(app, strict: bool = False) -> ProfilerStats:
+    """Profile the SQL run by every request.
+
+    Adds X-SQL-Queries / X-SQL-Time-Ms response headers, prints repeated
+    and unindexed statements, and in strict mode turns requests that exceed
+    their query budget into errors.
+    """
+    install()
+    stats = ProfilerStats()
+
+    @app.before_request
+    def _start_sql_profile():
+        g.sql_profile = _local.profile = RequestProfile(request.endpoint or request.path)
+
+    @app.teardown_request
+    def _stop_sql_profile(exc):
+        _local.profile = None
+
+    @app.after_request
+    def _check_sql_profile(response):
+        result = g.pop('sql_profile', None)
+        _local.profile = None
+        if result is None:
+            return response
+
+        budget = QUERY_BUDGETS.get(result.name, DEFAULT_QUERY_BUDGET)
+        repeated = result.repeated()
+        unindexed = result.unindexed()
+        over_budget = result.count > budget
+        stats.add(result, over_budget, len(repeated), len(unindexed))
+
+        response.headers['X-SQL-Queries'] = str(result.count)
+        response.headers['X-SQL-Time-Ms'] = f"{result.total_ms:.2f}"
+
+        for sql, count in repeated.items():
+            print(f"[sql] {result.name}: ran {count} times (possible N+1): {sql}")
+        for sql, scans in unindexed.items():
+            print(f"[sql] {result.name}: unindexed ({'; '.join(scans)}): {sql}")
+        if over_budget:
+            message = f"{result.name} ran {result.count} queries, budget is {budget}"
+            print(f"[sql] {message}")
+            if strict:
+                raise QueryBudgetExceeded(message)
+        return response
+
+    return stats
+
+
+def profiling_mode() -> Optional[str]:
+    """SQL_PROFILE setting: None (off), 'on' or 'strict'"""
+    mode = os.getenv('SQL_PROFILE', '').strip().lower()
+    if mode in ('', '0', 'off', 'false'):
+        return None
+    return 'strict' if mode == 'strict' else 'on'
@@ -0,0 +1,89 @@
+import atexit
+import importlib
+import sqlite3
+
+import pytest
+
+from sql_profiler import QUERY_BUDGETS, init_sql_profiling
+
+
+@pytest.fixture(scope='module')
+def client(tmp_path_factory):
+    """The app in strict SQL profiling mode, on a fresh database in a temp directory"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp('app'))
+        mp.setenv('ENABLE_SCHEDULER', '0')
+        mp.delenv('SQL_PROFILE', raising=False)
+        mp.delenv('OPENAI_API_KEY', raising=False)
+        app_module = importlib.import_module('app')
+        app_module.app.config['TESTING'] = True
+        stats = init_sql_profiling(app_module.app, strict=True)
+        # Flush buffered usage counts on every serve, so that write counts against the budgets too
+        mp.setattr(app_module.question_usage, 'flush_if_due', app_module.question_usage.flush)
+        yield app_module.app.test_client(), stats
+
+        # Write buffered state now, while still in the temp directory
+        for save in (app_module.question_usage.flush, app_module.ai_generator.cache.save):
+            save()
+            atexit.unregister(save)
+
+
+def test_endpoints_stay_within_query_budgets(client):
+    """Every endpoint runs under strict mode; QueryBudgetExceeded propagates and fails the test"""
+    client, stats = client
+
+    assert client.get('/api/themes').status_code == 200
+
+    registered = client.post('/api/auth/register', json={
+        'username': 'budget', 'email': 'budget@example.com', 'password': 'secret123'
+    })
+    assert registered.status_code == 200
+    auth = {'Authorization': f"Bearer {registered.get_json()['token']}"}
+    assert client.post('/api/auth/login', json={'username': 'budget', 'password': 'secret123'}).status_code == 200
+    assert client.get('/api/auth/me', headers=auth).status_code == 200
+    assert client.get('/api/themes', headers=auth).status_code == 200
+
+    created = client.post('/api/themes', json={'name': 'Budgets', 'description': 'Query budgets'}, headers=auth)
+    assert created.status_code == 200
+    theme_id = created.get_json()['theme_id']
+
+    # Empty theme: falls back to the database, then generates
+    generated = client.get(f'/api/questions/{theme_id}', headers=auth)
+    assert generated.status_code == 200
+    # Indexed theme: served from memory
+    assert client.get(f'/api/questions/{theme_id}').status_code == 200
+
+    # Question stored by someone else: index miss, then found in the database
+    conn = sqlite3.connect('game.db')
+    conn.execute("INSERT INTO themes (id, name, description) VALUES (900, 'Elsewhere', 'Stored directly')")
+    conn.execute("INSERT INTO questions (theme_id, option_a, option_b) VALUES (900, 'Fly', 'Swim')")
+    conn.commit()
+    conn.close()
+    assert client.get('/api/questions/900').status_code == 200
+
+    random_question = client.get('/api/questions/random')
+    assert random_question.status_code == 200
+    question_id = random_question.get_json()['id']
+
+    question = client.get(f'/api/question/{question_id}')
+    assert question.status_code == 200
+    assert client.get(f'/api/question/{question_id}', headers={'If-None-Match': question.headers['ETag']}).status_code == 304
+    assert client.get('/api/question/999999').status_code == 404
+
+    assert client.post('/api/responses', json={'question_id': question_id, 'selected_option': 'A'}).status_code == 200
+    assert client.post('/api/responses', json={'question_id': question_id, 'selected_option': 'B'}, headers=auth).status_code == 200
+    assert client.get(f'/api/stats/{question_id}').status_code == 200
+
+    stream = client.get(f'/api/stats/stream?question_ids={question_id}', buffered=False)
+    assert stream.status_code == 200
+    assert b'event: tally' in next(stream.response)
+    stream.close()
+
+    assert client.post('/api/generate-question', json={'theme_id': theme_id}, headers=auth).status_code == 200
+    assert client.get('/api/metrics').status_code == 200
+    assert client.post('/api/auth/logout', headers=auth).status_code == 200
+
+    summary = stats.summary()
+    assert set(QUERY_BUDGETS) <= set(summary), f"endpoints not exercised: {set(QUERY_BUDGETS) - set(summary)}"
+    for name, endpoint in summary.items():
+        assert endpoint['over_budget'] == 0, f"{name} ran {endpoint['max_queries']} queries, budget {endpoint['budget']}"
@@ -0,0 +1,5 @@
+from question_corpus import BYTES_PER_QUESTION_BUDGET, check_budget
+
+
+def test_corpus_stays_within_memory_budget():
+    assert check_budget(), f"question corpus is over {BYTES_PER_QUESTION_BUDGET} bytes/question"